@@ -1,18 +1,23 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import asyncio
+import functools
+import itertools
+import operator
 import re
+import sys
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import yaml
-import aiohttp
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+import soupsieve
 from dateutil import parser
 import logging
 from models import Database
 import warnings
 import pymysql
 import httpx
+import orjson
 from urllib.parse import urljoin, urlparse, quote, unquote
 
 # 禁用MySQL的重复条目警告
@@ -27,34 +32,150 @@ logger = logging.getLogger(__name__)
 # 关闭httpx详细日志，只显示WARNING及以上
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
+# 常见的日期格式模式
+_DATE_PATTERNS = [re.compile(p) for p in (
+    r'\d{4}[-/年]\d{1,2}[-/月]\d{1,2}[日]?',  # 2024-01-01 或 2024年01月01日
+    r'\d{4}\.\d{1,2}\.\d{1,2}',              # 2024.01.01
+    r'\d{2}/\d{2}/\d{4}',                    # 01/01/2024
+)]
+# 从容器文本中提取日期
+_DATE_EXTRACT_RE = re.compile(r'\d{4}[-年/]\d{1,2}[-月/]\d{1,2}')
+_YEAR_MONTH_SUB_RE = re.compile(r'[年月]')
+_WWW_RE = re.compile(r'^www\.')
+# CSS选择器开头的标签名，如 "ul.list-news li" 中的 "ul"
+_SELECTOR_TAG_RE = re.compile(r'^([a-zA-Z][\w-]*)')
+# class中包含日期关键字的元素（忽略大小写）
+_DATE_CLASS_SELECTOR = ','.join(f'[class*="{k}" i]' for k in ('date', 'time', 'pub', '时间', '日期'))
+# 已是规范的绝对URL（仅含无需编码的ASCII字符），可直接返回
+_ABS_URL_RE = re.compile(r'^https?://[A-Za-z0-9_.~-][A-Za-z0-9_.~:/?&=#-]*$')
+# 至少包含4位连续数字（年份）才交给dateutil解析
+_YEAR_RE = re.compile(r'\d{4}')
+
+@functools.lru_cache(maxsize=256)
+def _compile_selector(selector: str) -> soupsieve.SoupSieve:
+    """编译并缓存CSS选择器，同一网站重复爬取时无需重新解析"""
+    return soupsieve.compile(selector)
+
+def _intern(text: str) -> str:
+    """驻留较短的重复字符串（标题、URL、class名等），过长的原样返回"""
+    return sys.intern(text) if len(text) < 128 else text
+
+@functools.lru_cache(maxsize=4096)
+def _is_likely_date(text: str) -> bool:
+    """判断文本是否可能是日期"""
+    text = text.strip()
+    # 不含数字或过长的文本不可能是日期，直接排除
+    if len(text) > 40 or not any(c.isdigit() for c in text):
+        return False
+    # 检查是否匹配任何日期模式
+    for pattern in _DATE_PATTERNS:
+        if pattern.search(text):
+            return True
+
+    # dateutil解析很慢，只对包含年份的文本尝试
+    if not _YEAR_RE.search(text):
+        return False
+    # 尝试解析日期
+    try:
+        parser.parse(text)
+        return True
+    except:
+        return False
+
+    return False
+
+@functools.lru_cache(maxsize=4096)
+def _normalize_url(url: str, base: str) -> str:
+    """智能检测和修复URL，相对路径基于base补全"""
+    if not url:
+        return ""
+
+    url = url.strip()
+    # 绝大多数链接已是规范的绝对URL，跳过后续处理
+    if _ABS_URL_RE.match(url):
+        return url
+
+    # 处理空格和特殊字符
+    url = unquote(url)
+    url = url.replace(' ', '%20')
+
+    # 如果是javascript或mailto等无效链接，直接返回空
+    if url.lower().startswith(('javascript:', 'mailto:', '#')):
+        return ""
+
+    # 如果是相对路径，转换为绝对路径
+    if url.startswith('/') or url.startswith('./') or url.startswith('../'):
+        return urljoin(base, url)
+
+    # 如果缺少协议，补全
+    if not url.startswith(('http://', 'https://')):
+        # 检查是否是类似 www.xxx.com 的格式
+        if _WWW_RE.match(url):
+            return 'http://' + url
+        # 其他情况尝试用 urljoin 拼接
+        return urljoin(base, url)
+
+    # 检查URL格式是否正确
+    parsed = urlparse(url)
+    if not parsed.scheme or not parsed.netloc:
+        # 尝试用 urljoin 修复
+        fixed_url = urljoin(base, url)
+        parsed_fixed = urlparse(fixed_url)
+        if parsed_fixed.scheme and parsed_fixed.netloc:
+            return fixed_url
+        else:
+            return ""
+
+    # 编码非ASCII字符
+    url = quote(url, safe=':/?&=#%')
+    return url
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+}
+
 class UniversalCrawler:
-    def __init__(self, url: str, selector: str = None, exclude=None, headers: Dict = None, type_: str = None, json_path: str = None, field_map: dict = None):
+    def __init__(self, url: str, selector: str = None, exclude=None, headers: Dict = None, type_: str = None, json_path: str = None, field_map: dict = None, client: httpx.AsyncClient = None):
         self.url = url
         self.selector = selector
         self.exclude = exclude if exclude else []
+        self._exclude_compiled = self._compile_exclude()
+        self._exclude_selector = self._build_exclude_selector()
+        # 文本规则需与get_text(strip=True)的结果比较，无法用CSS表达，单独检查
+        self._exclude_texts = [args[0] for kind, *args in self._exclude_compiled if kind == 'text']
         self.type_ = type_
         self.json_path = json_path
         self.field_map = field_map or {}
-        self.headers = headers or {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-        }
-
-    async def fetch_page(self) -> str:
-        """获取网页内容"""
-        if self.type_ == "json":
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(self.url, headers=self.headers, timeout=10)
-                if resp.status_code != 200:
-                    raise Exception(f"HTTP {resp.status_code}: {self.url}")
-                return resp.text
+        self.headers = headers or DEFAULT_HEADERS
+        # 共享的HTTP客户端，由CrawlerManager统一创建，复用连接池
+        self.client = client
+
+        # 根据网站配置预先确定提取方式，爬取时不再重复判断
+        self._strainer = self._build_strainer()
+        self._find_containers = self._build_container_finder()
+        self._json_keys = tuple(self.json_path.split('.')) if self.json_path else ()
+        self._title_key = self.field_map.get('title', 'title')
+        self._url_key = self.field_map.get('url', 'url')
+        self._date_key = self.field_map.get('date', 'date')
+        self._date_format = self.field_map.get('date_format')
+
+    async def _get(self) -> httpx.Response:
+        """请求目标URL，优先使用共享客户端"""
+        if self.client is not None:
+            resp = await self.client.get(self.url, headers=self.headers)
         else:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.url, headers=self.headers) as response:
-                    if response.status != 200:
-                        raise Exception(f"HTTP {response.status}: {self.url}")
-                    return await response.text()
+            async with httpx.AsyncClient(follow_redirects=True, timeout=10) as client:
+                resp = await client.get(self.url, headers=self.headers)
+        if resp.status_code != 200:
+            raise Exception(f"HTTP {resp.status_code}: {self.url}")
+        return resp
+
+    async def fetch_page(self) -> Tuple[bytes, Optional[str]]:
+        """获取网页原始字节及响应头声明的编码，交由解析器直接解码"""
+        resp = await self._get()
+        return resp.content, resp.charset_encoding
 
     def _is_likely_title(self, text: str) -> bool:
         """判断文本是否可能是标题"""
@@ -70,147 +191,110 @@ class UniversalCrawler:
 
     def _is_likely_date(self, text: str) -> bool:
         """判断文本是否可能是日期"""
-        # 常见的日期格式模式
-        date_patterns = [
-            r'\d{4}[-/年]\d{1,2}[-/月]\d{1,2}[日]?',  # 2024-01-01 或 2024年01月01日
-            r'\d{4}\.\d{1,2}\.\d{1,2}',              # 2024.01.01
-            r'\d{2}/\d{2}/\d{4}',                    # 01/01/2024
-        ]
-        
-        text = text.strip()
-        # 检查是否匹配任何日期模式
-        for pattern in date_patterns:
-            if re.search(pattern, text):
-                return True
-                
-        # 尝试解析日期
-        try:
-            parser.parse(text)
-            return True
-        except:
-            return False
-        
-        return False
+        return _is_likely_date(text)
 
     def _normalize_url(self, url: str) -> str:
         """智能检测和修复URL"""
-        if not url:
-            return ""
-
-        url = url.strip()
-        # 处理空格和特殊字符
-        url = unquote(url)
-        url = url.replace(' ', '%20')
-
-        # 如果是javascript或mailto等无效链接，直接返回空
-        if url.lower().startswith(('javascript:', 'mailto:', '#')):
-            return ""
-
-        # 如果是相对路径，转换为绝对路径
-        if url.startswith('/') or url.startswith('./') or url.startswith('../'):
-            return urljoin(self.url, url)
-
-        # 如果缺少协议，补全
-        if not url.startswith(('http://', 'https://')):
-            # 检查是否是类似 www.xxx.com 的格式
-            if re.match(r'^www\\.', url):
-                return 'http://' + url
-            # 其他情况尝试用 urljoin 拼接
-            return urljoin(self.url, url)
-
-        # 检查URL格式是否正确
-        parsed = urlparse(url)
-        if not parsed.scheme or not parsed.netloc:
-            # 尝试用 urljoin 修复
-            fixed_url = urljoin(self.url, url)
-            parsed_fixed = urlparse(fixed_url)
-            if parsed_fixed.scheme and parsed_fixed.netloc:
-                return fixed_url
-            else:
-                return ""
-
-        # 编码非ASCII字符
-        url = quote(url, safe=':/?&=#%')
-        return url
-
-    def _should_exclude(self, tag) -> bool:
-        """
-        判断元素是否应该被排除
-        使用更严格和直接的方式检查元素及其父元素
-        """
-        if not tag or not hasattr(tag, 'attrs'):
-            return False
-
-        def check_element(element):
-            if not element or not hasattr(element, 'attrs'):
-                return False
-
-            for rule in self.exclude:
-                if not isinstance(rule, dict):
-                    continue
-
-                # 检查class
-                if 'class' in rule:
-                    element_classes = element.get('class', [])
-                    if isinstance(element_classes, str):
-                        element_classes = element_classes.split()
-                    rule_classes = rule['class'].split()
-                    if all(cls in element_classes for cls in rule_classes):
-                        logger.debug(f"排除元素: 匹配class规则 {rule['class']}")
-                        return True
-
-                # 检查id
-                if 'id' in rule and element.get('id') == rule['id']:
-                    logger.debug(f"排除元素: 匹配id规则 {rule['id']}")
-                    return True
-
-                # 检查特定属性
-                if 'attr' in rule:
-                    attr_name = rule['attr'].get('name')
-                    attr_value = rule['attr'].get('value')
-                    if attr_name and attr_value:
-                        if element.get(attr_name) == attr_value:
-                            logger.debug(f"排除元素: 匹配属性规则 {attr_name}={attr_value}")
-                            return True
-
-                # 检查文本内容
-                if 'text' in rule:
-                    element_text = element.get_text(strip=True)
-                    if rule['text'] in element_text:
-                        logger.debug(f"排除元素: 匹配文本规则 {rule['text']}")
-                        return True
-
-            return False
+        return _normalize_url(url, self.url)
 
-        # 检查当前元素
-        if check_element(tag):
+    def _compile_exclude(self) -> List[Tuple]:
+        """将排除规则预处理为便于匹配的元组列表，只在初始化时执行一次"""
+        compiled = []
+        for rule in self.exclude:
+            if not isinstance(rule, dict):
+                continue
+            if 'class' in rule:
+                compiled.append(('class', frozenset(_intern(cls) for cls in rule['class'].split())))
+            if 'id' in rule:
+                compiled.append(('id', _intern(str(rule['id']))))
+            if 'attr' in rule:
+                attr_name = rule['attr'].get('name')
+                attr_value = rule['attr'].get('value')
+                if attr_name and attr_value:
+                    compiled.append(('attr', _intern(attr_name), attr_value))
+            if 'text' in rule:
+                compiled.append(('text', rule['text']))
+        return compiled
+
+    def _build_exclude_selector(self) -> Optional[str]:
+        """将class、id和属性排除规则合并为一个CSS选择器，整页只需查询一次"""
+        def quote_value(value: str) -> str:
+            return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+        fragments = []
+        for kind, *args in self._exclude_compiled:
+            if kind == 'class':
+                if args[0]:
+                    fragments.append(''.join('.' + soupsieve.escape(cls) for cls in sorted(args[0])))
+            elif kind == 'id':
+                fragments.append('#' + soupsieve.escape(str(args[0])))
+            elif kind == 'attr':
+                fragments.append(f'[{soupsieve.escape(args[0])}={quote_value(args[1])}]')
+        return ', '.join(fragments) if fragments else None
+
+    def _excluded_ids(self, soup: BeautifulSoup) -> set:
+        """一次性查询所有匹配排除规则的元素，返回其id集合"""
+        if not self._exclude_selector:
+            return set()
+        return {id(node) for node in _compile_selector(self._exclude_selector).select(soup)}
+
+    def _should_exclude(self, tag, excluded_ids: set) -> bool:
+        """判断元素或其父元素（最多5层）是否匹配排除规则"""
+        nodes = [tag, *itertools.islice(tag.parents, 5)]
+        if any(id(node) in excluded_ids for node in nodes):
             return True
-
-        # 检查所有父元素（直到最多5层）
-        current = tag.parent
-        depth = 0
-        while current and depth < 5:
-            if check_element(current):
-                return True
-            current = current.parent
-            depth += 1
-
+        # 检查文本内容
+        if self._exclude_texts:
+            for node in nodes:
+                element_text = node.get_text(strip=True)
+                for text in self._exclude_texts:
+                    if text in element_text:
+                        logger.debug(f"排除元素: 匹配文本规则 {text}")
+                        return True
         return False
 
-    def _extract_items(self, soup: BeautifulSoup) -> List[Tuple[str, str, str]]:
-        """提取页面中的标题、URL和日期"""
-        items = []
+    def _build_strainer(self) -> Optional[SoupStrainer]:
+        """根据选择器构造SoupStrainer，只解析可能包含内容的标签"""
+        # 排除规则需要检查父元素，此时必须保留完整文档树
+        if self.exclude:
+            return None
+        if not self.selector:
+            return SoupStrainer(['li', 'div', 'article'])
+        # 只处理以标签名开头的单个选择器，其余情况（如 ".list li"）无法安全裁剪
+        # 兄弟选择器（+、~）依赖开头元素之外的节点，也不能裁剪
+        selector = self.selector.strip()
+        if ',' in selector or '+' in selector or '~' in selector:
+            return None
+        # 开头部分带伪类（如 "div:first-child li"）时依赖兄弟节点，同样不能裁剪
+        first_compound = re.split(r'[\s>]', selector, maxsplit=1)[0]
+        if ':' in first_compound:
+            return None
+        match = _SELECTOR_TAG_RE.match(first_compound)
+        if not match:
+            return None
+        # lxml会将标签名转为小写，选择器中的标签名需同样处理
+        return SoupStrainer(match.group(1).lower())
+
+    def _build_container_finder(self):
+        """返回查找内容容器的函数，已编译的选择器直接绑定在闭包中"""
+        if self.selector:
+            compiled = _compile_selector(self.selector)
+            return compiled.select
+        return lambda soup: soup.find_all(['li', 'div', 'article'])
+
+    def _extract_items(self, soup: BeautifulSoup) -> Tuple[List[str], List[str], List[str]]:
+        """提取页面中的标题、URL和日期，按列分别返回"""
+        titles, urls, dates = [], [], []
+        items = (titles, urls, dates)
         try:
-            if self.selector:
-                containers = soup.select(self.selector)
-            else:
-                containers = soup.find_all(['li', 'div', 'article'])
+            containers = self._find_containers(soup)
             if not containers:
                 logger.warning(f"网站 {self.url}: 未找到任何内容")
                 return items
             # 排除指定class、id和url的内容
-            if self.exclude:
-                containers = [c for c in containers if not self._should_exclude(c)]
+            if self._exclude_selector or self._exclude_texts:
+                excluded_ids = self._excluded_ids(soup)
+                containers = [c for c in containers if not self._should_exclude(c, excluded_ids)]
             for container in containers:
                 title = None
                 url = None
@@ -223,87 +307,93 @@ class UniversalCrawler:
                     title = link.get_text(strip=True)
                 # 提取日期
                 date_text = None
-                date_element = container.find(class_=lambda x: x and any(keyword in str(x).lower() for keyword in ['date', 'time', 'pub', '时间', '日期']))
+                date_element = _compile_selector(_DATE_CLASS_SELECTOR).select_one(container)
                 if date_element:
                     date_text = date_element.get_text(strip=True)
                 else:
                     # 尝试从文本中提取日期
                     text = container.get_text(strip=True)
-                    date_matches = re.findall(r'\d{4}[-年/]\d{1,2}[-月/]\d{1,2}', text)
-                    if date_matches:
-                        date_text = date_matches[0]
+                    # 不含"19"/"20"年份前缀的文本不可能有日期，跳过正则匹配
+                    if '20' in text or '19' in text:
+                        date_match = _DATE_EXTRACT_RE.search(text)
+                        if date_match:
+                            date_text = date_match.group()
                 if date_text:
                     # 统一日期格式
-                    date_text = re.sub(r'[年月]', '-', date_text).replace('日', '')
+                    date_text = _YEAR_MONTH_SUB_RE.sub('-', date_text).replace('日', '')
                     date = date_text.strip('-')
                 if title and url:
-                    items.append((title, url, date))
-            if items:
-                pass
-            else:
+                    titles.append(_intern(title))
+                    urls.append(_intern(url))
+                    dates.append(date)
+            if not titles:
                 logger.warning(f"{self.url}: 未能提取到有效数据")
         except Exception as e:
             logger.error(f"{self.url}: 提取内容时出错 - {str(e)}")
         return items
 
+    def _parse_and_extract(self, html: bytes, encoding: Optional[str] = None) -> Tuple[List[str], List[str], List[str]]:
+        """解析HTML并提取内容（同步执行）"""
+        soup = BeautifulSoup(html, 'lxml', parse_only=self._strainer, from_encoding=encoding)
+        return self._extract_items(soup)
+
     async def crawl(self) -> List[Dict]:
         """执行爬取"""
         try:
             if self.type_ == "json":
-                async with httpx.AsyncClient() as client:
-                    resp = await client.get(self.url, headers=self.headers, timeout=10)
-                    if resp.status_code != 200:
-                        raise Exception(f"HTTP {resp.status_code}: {self.url}")
-                    data = resp.json() if hasattr(resp, 'json') else resp.json
-                    # 通用json主列表提取
-                    items = data
-                    if self.json_path:
-                        for part in self.json_path.split('.'):
-                            if isinstance(items, dict):
-                                items = items.get(part, [])
-                            else:
-                                logger.warning(f"json_path配置有误，{part}不是dict，实际类型为{type(items)}，内容为{str(items)[:100]}")
-                                break
-                    if not isinstance(items, list):
-                        # 智能兜底：如果是dict且只有一个key且value为list，自动取list
-                        if isinstance(items, dict) and len(items) == 1 and isinstance(list(items.values())[0], list):
-                            items = list(items.values())[0]
+                resp = await self._get()
+                try:
+                    data = orjson.loads(resp.content)
+                except orjson.JSONDecodeError:
+                    # orjson只支持UTF-8及标准JSON，其他情况回退到标准库解析
+                    data = resp.json()
+                # 通用json主列表提取
+                items = data
+                if self._json_keys:
+                    for part in self._json_keys:
+                        if isinstance(items, dict):
+                            items = items.get(part, [])
                         else:
-                            logger.error(f"json_path提取后不是list，实际类型为{type(items)}，内容为{str(items)[:200]}")
-                            return []
-                    # 字段映射
-                    title_key = self.field_map.get('title', 'title')
-                    url_key = self.field_map.get('url', 'url')
-                    date_key = self.field_map.get('date', 'date')
-                    date_format = self.field_map.get('date_format')
-                    results = []
-                    for item in items:
+                            logger.warning(f"json_path配置有误，{part}不是dict，实际类型为{type(items)}，内容为{str(items)[:100]}")
+                            break
+                if not isinstance(items, list):
+                    # 智能兜底：如果是dict且只有一个key且value为list，自动取list
+                    if isinstance(items, dict) and len(items) == 1 and isinstance(list(items.values())[0], list):
+                        items = list(items.values())[0]
+                    else:
+                        logger.error(f"json_path提取后不是list，实际类型为{type(items)}，内容为{str(items)[:200]}")
+                        return []
+                # 字段映射
+                title_key = self._title_key
+                url_key = self._url_key
+                date_key = self._date_key
+                date_format = self._date_format
+                getter = operator.itemgetter(title_key, url_key, date_key)
+                results = []
+                for item in items:
+                    try:
+                        title, url, date = getter(item)
+                    except KeyError:
+                        # 缺少字段时逐个取值，缺失的字段为None
                         title = item.get(title_key)
                         url = item.get(url_key)
                         date = item.get(date_key)
-                        if date and date_format == "timestamp":
-                            try:
-                                date = datetime.fromtimestamp(int(date)).strftime('%Y-%m-%d')
-                            except Exception:
-                                pass
-                        results.append({
-                            'title': title,
-                            'url': url,
-                            'date': date
-                        })
-                    return results
-            else:
-                html = await self.fetch_page()
-                soup = BeautifulSoup(html, 'html.parser')
-                items = self._extract_items(soup)
-                results = []
-                for title, url, date in items:
+                    if date and date_format == "timestamp":
+                        try:
+                            date = datetime.fromtimestamp(int(date)).strftime('%Y-%m-%d')
+                        except Exception:
+                            pass
                     results.append({
                         'title': title,
                         'url': url,
                         'date': date
                     })
                 return results
+            else:
+                html, encoding = await self.fetch_page()
+                # 解析是CPU密集操作，放到线程中执行，避免阻塞其他网站的请求
+                titles, urls, dates = await asyncio.to_thread(self._parse_and_extract, html, encoding)
+                return [{'title': t, 'url': u, 'date': d} for t, u, d in zip(titles, urls, dates)]
         except Exception as e:
             logger.error(f"爬取失败: {str(e)}")
             return []
@@ -315,6 +405,9 @@ class CrawlerManager:
         self.db = None
         self.bark_url = None
         self.bark_group = None
+        self.http = None
+        # 限制同时进行的Bark推送数量，避免触发频率限制
+        self.bark_sem = asyncio.Semaphore(10)
 
     def load_config(self):
         """加载配置文件"""
@@ -345,8 +438,12 @@ class CrawlerManager:
         if self.bark_group:
             payload["group"] = self.bark_group
         try:
-            async with httpx.AsyncClient() as client:
-                await client.get(self.bark_url, params=payload, timeout=10)
+            async with self.bark_sem:
+                if self.http is not None:
+                    await self.http.get(self.bark_url, params=payload)
+                else:
+                    async with httpx.AsyncClient() as client:
+                        await client.get(self.bark_url, params=payload, timeout=10)
             logger.info(f"Bark推送成功: {title}")
         except Exception as e:
             logger.warning(f"Bark推送失败: {str(e)}")
@@ -359,56 +456,78 @@ class CrawlerManager:
             await self.db.connect()
             
             # 为每个网站创建数据表
-            for website in self.config['websites']:
-                await self.db.create_table_for_website(website['name'])
+            await self.db.create_tables([website['name'] for website in self.config['websites']])
         except Exception as e:
             logger.error(f"初始化数据库失败: {str(e)}")
             if self.db:
                 await self.db.close()
             raise
 
+    async def crawl_site(self, site: Dict):
+        """爬取单个网站并保存、推送新增数据"""
+        logger.info(f"开始爬取网站: {site['name']}")
+        crawler = UniversalCrawler(
+            site['url'],
+            site.get('selector'),
+            site.get('exclude'),
+            type_=site.get('type'),
+            json_path=site.get('json_path'),
+            field_map=site.get('field_map'),
+            client=self.http
+        )
+        results = await crawler.crawl()
+        
+        if results:
+            logger.info(f"{site['name']} {len(results)} 条数据")
+            # 保存并取回真正新增的url，推送新增
+            new_urls = await self.db.save_articles_returning_new(site['name'], results)
+            pushes = [
+                self.bark_push(item['title'], item['url'], item.get('date'), site['name'], site.get('desc'))
+                for item in results if item['url'] in new_urls
+            ]
+            await asyncio.gather(*pushes, return_exceptions=True)
+        else:
+            logger.warning(f"网站 {site['name']} 未爬取到数据")
+
     async def crawl_all(self):
-        """爬取所有配置的网站"""
+        """并发爬取所有配置的网站"""
+        sites = []
         for site in self.config['websites']:
             # 新增：根据 enable 字段判断是否启用
             if not site.get('enable', True):
                 logger.info(f"跳过未启用网站: {site['name']}")
                 continue
-            logger.info(f"开始爬取网站: {site['name']}")
-            crawler = UniversalCrawler(
-                site['url'],
-                site.get('selector'),
-                site.get('exclude'),
-                type_=site.get('type'),
-                json_path=site.get('json_path'),
-                field_map=site.get('field_map')
-            )
-            results = await crawler.crawl()
-            
-            if results:
-                logger.info(f"{site['name']} {len(results)} 条数据")
-                # 保存前后对比，推送新增
-                before = await self.db.get_all_urls(site['name']) if hasattr(self.db, 'get_all_urls') else set()
-                await self.db.save_articles(site['name'], results)
-                after = await self.db.get_all_urls(site['name']) if hasattr(self.db, 'get_all_urls') else set()
-                new_urls = set()
-                if before and after:
-                    new_urls = set(after) - set(before)
-                else:
-                    new_urls = set([item['url'] for item in results])
-                for item in results:
-                    if item['url'] in new_urls:
-                        await self.bark_push(item['title'], item['url'], item.get('date'), site['name'], site.get('desc'))
-            else:
-                logger.warning(f"网站 {site['name']} 未爬取到数据")
+            sites.append(site)
+
+        # 用信号量限制同时爬取的网站数量
+        sem = asyncio.Semaphore(self.config.get('max_concurrency', 20))
+
+        async def _one(site):
+            async with sem:
+                await self.crawl_site(site)
+
+        results = await asyncio.gather(*[_one(site) for site in sites], return_exceptions=True)
+        for site, result in zip(sites, results):
+            if isinstance(result, Exception):
+                logger.error(f"网站 {site['name']} 爬取出错: {str(result)}")
 
     async def run(self):
         """运行爬虫管理器"""
         try:
             self.load_config()
             await self.init_database()
+            # 所有网站共享一个长连接客户端，避免每次请求重复握手
+            self.http = httpx.AsyncClient(
+                http2=True,
+                headers=DEFAULT_HEADERS,
+                timeout=10,
+                follow_redirects=True,
+                limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+            )
             await self.crawl_all()
         finally:
+            if self.http:
+                await self.http.aclose()
             if self.db:
                 await self.db.close()
 
@@ -1,10 +1,42 @@
+import asyncio
 import aiomysql
 import logging
+import os
+from operator import itemgetter
+import re
+import tempfile
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# url字段的最大长度，与建表语句中的VARCHAR(255)一致
+URL_MAX_LENGTH = 255
+
+# 按插入列的顺序取出文章字段
+_ARTICLE_FIELDS = itemgetter('title', 'url', 'date')
+
+# 表名只允许小写字母、数字和下划线，防止SQL注入
+_IDENT_RE = re.compile(r'[a-z0-9_]+')
+
+def _write_tsv(rows: List[tuple]) -> str:
+    """将文章行写入供LOAD DATA读取的临时TSV文件，返回文件路径"""
+    def escape(value):
+        if value is None:
+            return '\\N'
+        return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+
+    fd, path = tempfile.mkstemp(suffix='.tsv')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+            for row in rows:
+                f.write('\t'.join(escape(value) for value in row) + '\n')
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
 class Database:
     def __init__(self, config):
         self.host = config['host']
@@ -13,26 +45,73 @@ class Database:
         self.password = config['password']
         self.db_name = config['db_name']
         self.charset = config['charset']
+        # 每条INSERT语句包含的最大行数，避免超过max_allowed_packet
+        self.batch_size = config.get('batch_size', 500)
+        # 超过该行数时改用LOAD DATA LOCAL INFILE批量导入
+        self.load_data_threshold = config.get('load_data_threshold', 5000)
+        # 服务器拒绝LOAD DATA LOCAL INFILE后不再尝试
+        self._load_data_enabled = True
+        # 连接池大小，最大值应与爬取并发数（max_concurrency）相近
+        self.pool_min = config.get('pool_min', 4)
+        self.pool_max = config.get('pool_max', 16)
         self.pool = None
+        # 每个表的INSERT语句模板，只构造一次
+        self._insert_sql_cache: Dict[str, str] = {}
+        # 网站名到校验后表名的映射
+        self._tables: Dict[str, str] = {}
+        # 数据库中已存在的表，已存在的表无需再执行建表语句
+        self._created_tables: Set[str] = set()
+
+    def _table(self, name: str) -> str:
+        """将网站名转换为校验过的小写表名，结果缓存"""
+        table = self._tables.get(name)
+        if table is None:
+            table = name.lower()
+            if not _IDENT_RE.fullmatch(table):
+                raise ValueError(f"非法的表名: {name}")
+            self._tables[name] = table
+        return table
+
+    async def _create_pool(self):
+        """创建数据库连接池"""
+        return await aiomysql.create_pool(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            db=self.db_name,
+            charset=self.charset,
+            minsize=self.pool_min,
+            maxsize=self.pool_max,
+            local_infile=True,
+            autocommit=True,
+            # 每个物理连接建立时禁用一次警告，无需每次操作前后设置
+            init_command="SET sql_notes = 0"
+        )
 
     async def connect(self):
         """连接数据库"""
         try:
-            # 创建数据库连接池
-            self.pool = await aiomysql.create_pool(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                db=self.db_name,
-                charset=self.charset,
-                autocommit=True
-            )
-            await self.create_database()
+            try:
+                self.pool = await self._create_pool()
+            except aiomysql.OperationalError as e:
+                # 1049: 数据库不存在，先创建数据库再重新建立连接池
+                if e.args[0] != 1049:
+                    raise
+                await self.create_database()
+                self.pool = await self._create_pool()
+            await self._load_existing_tables()
         except Exception as e:
-            logger.error(f"数据库连接失败: {str(e)}")
+            logger.error("数据库连接失败: %s", e)
             raise
 
+    async def _load_existing_tables(self):
+        """查询一次数据库中已有的表"""
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SHOW TABLES")
+                self._created_tables = set(row[0] for row in await cursor.fetchall())
+
     async def create_database(self):
         """创建数据库"""
         try:
@@ -41,31 +120,29 @@ class Database:
                 host=self.host,
                 port=self.port,
                 user=self.user,
-                password=self.password
+                password=self.password,
+                init_command="SET sql_notes = 0"
             )
             try:
                 async with conn.cursor() as cursor:
-                    # 禁用警告
-                    await cursor.execute("SET sql_notes = 0")
                     await cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.db_name}")
-                    await cursor.execute("SET sql_notes = 1")
             finally:
                 conn.close()
         except Exception as e:
-            logger.error(f"创建数据库失败: {str(e)}")
+            logger.error("创建数据库失败: %s", e)
             raise
 
     async def create_table(self, table_name: str):
         """创建数据表"""
         try:
+            table = self._table(table_name)
+            if table in self._created_tables:
+                return
             async with self.pool.acquire() as conn:
                 async with conn.cursor() as cursor:
-                    # 禁用警告
-                    await cursor.execute("SET sql_notes = 0")
-                    
                     await cursor.execute(f"""
-                        CREATE TABLE IF NOT EXISTS {table_name} (
-                            id INT AUTO_INCREMENT PRIMARY KEY,
+                        CREATE TABLE IF NOT EXISTS {table} (
+                            id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
                             title TEXT NOT NULL,
                             url VARCHAR(255) NOT NULL,
                             pub_date DATE,
@@ -73,51 +150,160 @@ class Database:
                             UNIQUE KEY unique_url (url)
                         )
                     """)
-                    
-                    # 恢复警告
-                    await cursor.execute("SET sql_notes = 1")
+            self._created_tables.add(table)
         except Exception as e:
-            logger.error(f"创建表 {table_name} 失败: {str(e)}")
+            logger.error("创建表 %s 失败: %s", table_name, e)
             raise
 
     async def create_table_for_website(self, website_name: str):
         """为特定网站创建数据表"""
-        await self.create_table(website_name.lower())
+        await self.create_table(website_name)
 
     async def create_tables(self, website_names: list):
-        """创建所有网站的数据表"""
-        for name in website_names:
-            await self.create_table_for_website(name)
+        """并发创建所有网站的数据表"""
+        await asyncio.gather(*(self.create_table_for_website(name) for name in website_names))
+
+    def _insert_sql(self, table_name: str) -> str:
+        """获取指定表的INSERT语句模板"""
+        sql = self._insert_sql_cache.get(table_name)
+        if sql is None:
+            # 重复行走ON DUPLICATE KEY UPDATE的空更新，影响行数为0，新插入的行为1
+            sql = (f"INSERT IGNORE INTO {table_name} (title, url, pub_date) VALUES (%s, %s, %s) "
+                   "ON DUPLICATE KEY UPDATE id = id")
+            self._insert_sql_cache[table_name] = sql
+        return sql
+
+    async def _load_data(self, cursor, table_name: str, rows: List[tuple]) -> int:
+        """通过LOAD DATA LOCAL INFILE批量导入，返回实际插入的行数"""
+        # aiomysql只能从文件读取LOCAL INFILE数据，先在线程中写入临时文件
+        path = await asyncio.to_thread(_write_tsv, rows)
+        try:
+            await cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE {table_name} CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' (title, url, pub_date)",
+                (path,)
+            )
+            return cursor.rowcount
+        finally:
+            os.remove(path)
+
+    async def _insert_rows(self, cursor, table: str, rows: List[tuple]) -> int:
+        """插入文章行，返回实际插入的行数；大批量优先使用LOAD DATA"""
+        if self._load_data_enabled and len(rows) >= self.load_data_threshold:
+            try:
+                return await self._load_data(cursor, table, rows)
+            except aiomysql.MySQLError as e:
+                # 1148/3948: 服务器未开启local_infile（MySQL 8默认关闭），改用批量INSERT
+                if e.args[0] not in (1148, 3948):
+                    raise
+                logger.warning("服务器未启用LOAD DATA LOCAL INFILE，改用批量INSERT: %s", e)
+                self._load_data_enabled = False
+
+        # 分批executemany，驱动会将每批合并为一条多行INSERT
+        sql = self._insert_sql(table)
+        new_count = 0
+        for start in range(0, len(rows), self.batch_size):
+            await cursor.executemany(sql, rows[start:start + self.batch_size])
+            # 影响行数即为实际插入的行数
+            new_count += cursor.rowcount
+        return new_count
 
     async def save_articles(self, table_name: str, articles: List[Dict]):
         """保存文章数据，只统计真正新增的条数"""
+        await self.save_articles_returning_new(table_name, articles)
+
+    async def _select_existing_urls(self, cursor, table: str, urls: List[str]) -> Set[str]:
+        """分批查询给定url中已保存在表中的url（返回数据库中保存的形式）"""
+        existing = set()
+        for start in range(0, len(urls), self.batch_size):
+            chunk = urls[start:start + self.batch_size]
+            await cursor.execute(
+                f"SELECT url FROM {table} WHERE url IN ({','.join(['%s'] * len(chunk))})",
+                chunk
+            )
+            existing.update(row[0] for row in await cursor.fetchall())
+        return existing
+
+    async def _save_chunk(self, table: str, unique: Dict[str, tuple]) -> Tuple[int, Set[str]]:
+        """在独立的连接和事务中保存一部分文章，返回新增条数和新增url集合"""
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                # 先查出已存在的url，只插入真正的新文章，避免重复行消耗自增id和唯一索引
+                existing = await self._select_existing_urls(cursor, table, list(unique))
+                rows = [row for url, row in unique.items() if url not in existing]
+                if not rows:
+                    return 0, set()
+
+                # 所有批次放在同一个事务中，只需一次提交
+                await conn.begin()
+                try:
+                    new_count = await self._insert_rows(cursor, table, rows)
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+
+                sent = set(row[1] for row in rows)
+                if new_count == len(rows):
+                    return new_count, sent
+                if new_count == 0:
+                    return 0, set()
+                # 部分行被忽略（如大小写或重音不同的url被排序规则视为重复），
+                # 已存在的变体以其保存的形式返回，与发送的url精确求交集即可剔除
+                stored = await self._select_existing_urls(cursor, table, list(sent))
+                return new_count, sent & stored
+
+    async def save_articles_returning_new(self, table_name: str, articles: List[Dict]) -> Set[str]:
+        """保存文章数据，返回真正新增的url集合"""
         if not articles:
-            return
+            return set()
+
+        # 同一批次中url重复的文章只保留第一条，与INSERT IGNORE的行为一致
+        # url按字段长度截断，与数据库中实际保存的值保持一致
+        for article in articles:
+            article.setdefault('date', None)
+        unique = {}
+        for title, url, date in map(_ARTICLE_FIELDS, articles):
+            # 没有url的文章无法去重，直接跳过
+            if not url:
+                continue
+            url = url[:URL_MAX_LENGTH]
+            unique.setdefault(url, (title, url, date))
 
         try:
-            async with self.pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    # 插入前的总行数
-                    await cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                    before_count = (await cursor.fetchone())[0]
-
-                    # 禁用警告
-                    await cursor.execute("SET sql_notes = 0")
-                    for article in articles:
-                        await cursor.execute(
-                            f"INSERT IGNORE INTO {table_name} (title, url, pub_date) VALUES (%s, %s, %s)",
-                            (article['title'], article['url'], article.get('date'))
-                        )
-                    await conn.commit()
-                    await cursor.execute("SET sql_notes = 1")
+            table = self._table(table_name)
+            # 达到LOAD DATA阈值的批次整体导入，不分片，否则分片后每片都达不到阈值
+            if self._load_data_enabled and len(unique) >= self.load_data_threshold:
+                shard_count = 1
+            else:
+                # 按url哈希分片，每片约batch_size行，分别使用连接池中的不同连接并发写入
+                shard_count = max(1, min(len(unique) // self.batch_size, self.pool_max))
+            shards = [{} for _ in range(shard_count)]
+            for url, row in unique.items():
+                shards[hash(url) % shard_count][url] = row
 
-                    # 插入后的总行数
-                    await cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                    after_count = (await cursor.fetchone())[0]
-                    new_count = after_count - before_count
-                    logger.info(f"{table_name}: 新增 {new_count} 条数据")
+            results = await asyncio.gather(
+                *(self._save_chunk(table, shard) for shard in shards),
+                return_exceptions=True
+            )
+            new_count = 0
+            new_urls = set()
+            errors = []
+            for result in results:
+                if isinstance(result, Exception):
+                    errors.append(result)
+                    continue
+                new_count += result[0]
+                new_urls |= result[1]
+            # 每个分片独立提交，只要有分片成功就返回已保存的部分
+            if errors and len(errors) == len(results):
+                raise errors[0]
+            for error in errors:
+                logger.error("保存数据到表 %s 部分失败: %s", table_name, error)
+            logger.info("%s: 新增 %d 条数据", table_name, new_count)
+            return new_urls
         except Exception as e:
-            logger.error(f"保存数据到表 {table_name} 失败: {str(e)}")
+            logger.error("保存数据到表 %s 失败: %s", table_name, e)
             raise
 
     async def close(self):
@@ -131,11 +317,12 @@ class Database:
         """获取指定表的所有url集合"""
         urls = set()
         try:
+            table = self._table(table_name)
             async with self.pool.acquire() as conn:
                 async with conn.cursor() as cursor:
-                    await cursor.execute(f"SELECT url FROM {table_name}")
+                    await cursor.execute(f"SELECT url FROM {table}")
                     rows = await cursor.fetchall()
                     urls = set(row[0] for row in rows)
         except Exception as e:
-            logger.error(f"获取表 {table_name} 所有url失败: {str(e)}")
+            logger.error("获取表 %s 所有url失败: %s", table_name, e)
         return urls 
\ No newline at end of file